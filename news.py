@@ -1,59 +1,180 @@
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 import requests
-import random
 import time
+import hashlib
+import re
+import threading
+from itertools import cycle
+from concurrent.futures import ThreadPoolExecutor, wait
 import pandas as pd
 import numpy as np
-from bs4 import BeautifulSoup
+import torch
+import diskcache
+import orjson
+from lxml import etree
 import nltk
 from nltk.sentiment import SentimentIntensityAnalyzer
-from transformers import pipeline
+from transformers import AutoModelForSeq2SeqLM, AutoModelForSequenceClassification, AutoTokenizer
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
-from urllib.parse import quote
-
-# Ensure VADER lexicon is downloaded
-nltk.download('vader_lexicon')
+from urllib.parse import parse_qsl, quote, urlencode, urlparse
 
 # -----------------------------
 # 1) Configuration
 # -----------------------------
 NEWS_API_KEY = "YOUR_API_KEY_HERE"  # Replace with your actual API key
+MAX_FETCH_WORKERS = 8  # Background network requests (keeps us polite to news hosts)
+MAX_ARTICLE_CHARS = 5000  # Article text passed on to the summarizer
+ARTICLE_CHUNK_BYTES = 32 * 1024  # Read size when streaming article pages
+HOST_MIN_INTERVAL = 0.5  # Minimum seconds between requests to the same host
+NEWSDATA_HEDGE_DELAY = 2.0  # Seconds to wait on NewsData.io before also starting the RSS fallback
+NEWS_CACHE_TTL = 10 * 60  # Seconds a fetched article list stays fresh (disk only, so entries never outlive it)
+ARTICLE_CACHE_TTL = 60 * 60  # Seconds article text and summaries stay in memory
+SENTIMENT_CACHE_TTL = 7 * 24 * 60 * 60  # Seconds a sentiment label stays on disk
+SUMMARY_CACHE_TTL = 24 * 60 * 60  # Seconds an article summary stays on disk
+FINBERT_MAX_TOKENS = 128  # Headline + short summary; attention cost grows with length squared
+FINBERT_BATCH_SIZE = 16  # Texts per FinBERT forward pass
+SUMMARIZER_MODEL = "sshleifer/distilbart-cnn-12-6"  # Distilled bart-large-cnn, ~45% faster
+SUMMARIZER_BATCH_SIZE = 8  # Articles per summarizer forward pass
+HEADLINE_OVERLAP_THRESHOLD = 0.6  # Skip summarizing pages whose text is mostly the headline
+TRACKING_PARAMS = {"fbclid", "gclid", "ocid", "cmpid"}  # Plus any utm_*; ignored when matching URLs
+SENTIMENT_LABELS = ["Positive", "Negative", "Neutral"]
+SENTIMENT_IDS = {label: i for i, label in enumerate(SENTIMENT_LABELS)}
+
+def gpu_dtype():
+    """Half-precision dtype for this GPU: bfloat16 on Ampere and newer, else float16"""
+    return torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
 
 @st.cache_resource
-def load_summarizer():
-    return pipeline("summarization", model="facebook/bart-large-cnn")
+def load_summarizer_tokenizer():
+    return AutoTokenizer.from_pretrained(SUMMARIZER_MODEL)
+
+@st.cache_resource
+def load_summarizer_model():
+    if torch.cuda.is_available():
+        return AutoModelForSeq2SeqLM.from_pretrained(SUMMARIZER_MODEL, torch_dtype=gpu_dtype()).to("cuda").eval()
+    return AutoModelForSeq2SeqLM.from_pretrained(SUMMARIZER_MODEL).eval()
 
 @st.cache_resource
 def load_vader():
+    # Download the VADER lexicon only if it isn't already installed
+    try:
+        nltk.data.find('sentiment/vader_lexicon.zip')
+    except LookupError:
+        nltk.download('vader_lexicon', quiet=True)
     return SentimentIntensityAnalyzer()
 
 @st.cache_resource
-def load_finbert():
-    return pipeline("text-classification", model="ProsusAI/finbert")
+def load_finbert_tokenizer():
+    return AutoTokenizer.from_pretrained("ProsusAI/finbert", use_fast=True)
 
+@st.cache_resource
+def load_finbert_model():
+    model = AutoModelForSequenceClassification.from_pretrained("ProsusAI/finbert").eval()
+    if torch.cuda.is_available():
+        return model.to("cuda", dtype=gpu_dtype())
+    # On CPU, dynamic int8 quantization of the Linear layers cuts latency and memory
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+USER_AGENTS = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/14.0.3 Safari/605.1.15",
+]
+
+# Precomputed so call sites don't build a fresh headers dict (or draw a random number) per request
+HEADERS_CYCLE = cycle([{"User-Agent": ua} for ua in USER_AGENTS])
+
+NEWSDATA_URL = "https://newsdata.io/api/1/news"
+GOOGLE_NEWS_RSS_URL = "https://news.google.com/rss/search?q={}&hl=en-IN&gl=IN&ceid=IN:en".format
+
+@st.cache_resource
 def get_session():
+    """Shared keep-alive session, so reruns reuse pooled TCP/TLS connections"""
     session = requests.Session()
-    retries = Retry(total=3, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504])
-    adapter = HTTPAdapter(max_retries=retries)
+    retries = Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504],
+                    allowed_methods=["GET"])
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=retries)
     session.mount("https://", adapter)
     session.mount("http://", adapter)
+    session.headers.update({"User-Agent": USER_AGENTS[0], "Accept-Language": "en-US,en;q=0.9"})
     return session
 
 session_news = get_session()
 
-USER_AGENTS = [
-    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/14.0.3 Safari/605.1.15",
-]
+@st.cache_resource
+def get_host_throttle():
+    """Lock and per-host next-allowed-request times, shared by all sessions"""
+    return threading.Lock(), {}
+
+host_lock, host_next_request = get_host_throttle()
+
+def wait_for_host(url):
+    """Space out requests to the same host instead of sleeping globally"""
+    host = urlparse(url).netloc
+    with host_lock:
+        now = time.monotonic()
+        slot = max(now, host_next_request.get(host, 0.0))
+        host_next_request[host] = slot + HOST_MIN_INTERVAL
+    if slot > now:
+        time.sleep(slot - now)
+
+@st.cache_resource
+def get_fetch_pool():
+    """Long-lived worker threads for network I/O; requests releases the GIL while waiting"""
+    return ThreadPoolExecutor(max_workers=MAX_FETCH_WORKERS, thread_name_prefix="news-fetch")
+
+fetch_pool = get_fetch_pool()
+
+def with_script_ctx(fn):
+    """Wrap fn to run under the calling script's run context, which st.cache_data expects on pool threads"""
+    ctx = get_script_run_ctx()
+    def run(*args):
+        add_script_run_ctx(ctx=ctx)
+        return fn(*args)
+    return run
+
+def _warm_up(url):
+    """HEAD a host so the session pool holds an open connection to it"""
+    wait_for_host(url)
+    session_news.head(url, timeout=5)
+
+@st.cache_resource
+def warm_up_connections():
+    """Open pooled TLS connections to the fixed news hosts in the background, once per process"""
+    urls = [GOOGLE_NEWS_RSS_URL("")]
+    # NewsData.io is only contacted once a real API key is configured
+    if NEWS_API_KEY != "YOUR_API_KEY_HERE":
+        urls.append(NEWSDATA_URL)
+    for url in urls:
+        fetch_pool.submit(_warm_up, url)
+
+warm_up_connections()
+
+@st.cache_resource
+def get_disk_cache():
+    """On-disk cache that survives server restarts and redeploys"""
+    return diskcache.Cache("./.news_cache", size_limit=2**30)
+
+disk_cache = get_disk_cache()
+
+# C-backed XML parser for RSS feeds; never expands entities from the feed
+RSS_PARSER = etree.XMLParser(resolve_entities=False)
+# Compiled once at import instead of on every feed parse
+RSS_ITEMS_XPATH = etree.XPath("/rss/channel/item[position() <= 5]")
 
 # -----------------------------
 # 2) News Fetching (Fixed)
 # -----------------------------
 
-def fetch_news_newsdata(company):
-    """Fetch news from NewsData.io with improved error handling"""
-    url = "https://newsdata.io/api/1/news"
+def _fetch_newsdata_articles(company):
+    """Fetch NewsData.io articles (cached on disk for 10 minutes; errors raise and are not cached)"""
+    key = f"newsdata:{company}"
+    cached = disk_cache.get(key)
+    if cached is not None:
+        return cached
+    
+    url = NEWSDATA_URL
     
     params = {
         "apikey": NEWS_API_KEY,
@@ -62,52 +183,115 @@ def fetch_news_newsdata(company):
         "page": 1
     }
     
-    try:
-        response = session_news.get(url, params=params, timeout=15)
-        st.write(f"Request URL: {response.url}")  # Debugging info
-        response.raise_for_status()
-        
-        data = response.json()
-        if "results" not in data:
-            st.error(f"Unexpected API response: {data}")
-            return []
+    wait_for_host(url)
+    response = session_news.get(url, params=params, timeout=15)
+    response.raise_for_status()
+    
+    data = orjson.loads(response.content)
+    if "results" not in data:
+        raise ValueError(f"Unexpected API response: {data}")
 
-        return [(art.get("title", "No Title"), art.get("description", "No summary available"), art.get("link", ""))
+    # A missing description stays None so the headline is scored alone and can be summarized on demand
+    articles = [(art.get("title", "No Title"), art.get("description"), art.get("link", ""))
                 for art in data["results"][:5]]
-    
+    disk_cache.set(key, articles, expire=NEWS_CACHE_TTL)
+    return articles
+
+def fetch_news_newsdata(company, pending=None):
+    """Fetch news from NewsData.io with improved error handling, or collect a request already in flight"""
+    try:
+        return pending.result() if pending else _fetch_newsdata_articles(company)
     except requests.exceptions.RequestException as e:
         st.error(f"NewsData.io API Error: {e}")
-        return []
+    except ValueError as e:
+        st.error(str(e))
+    return []
 
-def scrape_google_news(company):
-    """Fetch news from Google News RSS"""
-    url = f"https://news.google.com/rss/search?q={quote(company)}&hl=en-IN&gl=IN&ceid=IN:en"
+def _fetch_google_news_articles(company):
+    """Fetch Google News RSS items (cached on disk for 10 minutes; errors raise and are not cached)"""
+    key = f"gnews:{company}"
+    cached = disk_cache.get(key)
+    if cached is not None:
+        return cached
     
+    url = GOOGLE_NEWS_RSS_URL(quote(company))
+    
+    wait_for_host(url)
+    response = session_news.get(url, timeout=15)
+    response.raise_for_status()
+    
+    root = etree.fromstring(response.content, RSS_PARSER)
+    articles = [(item.findtext('title', "No Title"), item.findtext('description'), item.findtext('link', ""))
+                for item in RSS_ITEMS_XPATH(root)]
+    disk_cache.set(key, articles, expire=NEWS_CACHE_TTL)
+    return articles
+
+def scrape_google_news(company, prefetch=None):
+    """Fetch news from Google News RSS, or collect a prefetch already in flight"""
     try:
-        response = session_news.get(url, timeout=15)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, 'xml')
-        return [(item.title.text, item.description.text if item.description else "No summary available", item.link.text)
-                for item in soup.find_all('item')[:5]]
+        return prefetch.result() if prefetch else _fetch_google_news_articles(company)
     except Exception as e:
         st.error(f"Google News Error: {e}")
         return []
 
+def deduplicate_articles(articles):
+    """Drop repeats of the same story (same normalized headline or same URL), keeping the first"""
+    seen, unique = set(), []
+    for article in articles:
+        title, _, link = article
+        keys = set()
+        headline = re.sub(r'\W+', '', (title or "").lower())
+        # Missing or placeholder headlines say nothing about the story
+        if headline and headline != "notitle":
+            keys.add(hashlib.blake2b(headline.encode(), digest_size=8).digest())
+        if link:
+            parsed = urlparse(link)
+            query = urlencode(sorted((k, v) for k, v in parse_qsl(parsed.query)
+                                     if k not in TRACKING_PARAMS and not k.startswith("utm_")))
+            keys.add(f"{parsed.netloc}{parsed.path}?{query}")
+        if seen.isdisjoint(keys):
+            unique.append(article)
+        seen.update(keys)
+    return unique
+
 # -----------------------------
 # 3) Article Parsing
 # -----------------------------
 
+@st.cache_data(ttl=ARTICLE_CACHE_TTL, max_entries=512, show_spinner=False)
+def _fetch_article_text(url):
+    """Download an article and extract its paragraph text (cached for an hour; errors are not cached)"""
+    headers = next(HEADERS_CYCLE)
+    wait_for_host(url)
+    with session_news.get(url, headers=headers, timeout=20, stream=True) as response:
+        response.raise_for_status()
+        
+        # Trust a charset declared in the HTTP headers; without one, let libxml2 sniff <meta charset>
+        # (requests reports its ISO-8859-1 default for any undeclared text/* page)
+        declared = "charset=" in response.headers.get("Content-Type", "").lower()
+        # Parse the page as it streams in and stop downloading once we have enough text
+        parser = etree.HTMLPullParser(events=("end",), tag="p", encoding=response.encoding if declared else None)
+        paragraphs = []
+        for chunk in response.iter_content(chunk_size=ARTICLE_CHUNK_BYTES):
+            parser.feed(chunk)
+            if _read_paragraphs(parser, paragraphs) >= MAX_ARTICLE_CHARS:
+                break
+        else:
+            parser.close()
+            _read_paragraphs(parser, paragraphs)
+    return ' '.join(paragraphs)[:MAX_ARTICLE_CHARS]
+
+def _read_paragraphs(parser, paragraphs):
+    """Move finished <p> elements from the pull parser into paragraphs; return the text length so far"""
+    for _, p in parser.read_events():
+        paragraphs.append(''.join(p.itertext()))
+        p.clear()
+    return sum(len(text) + 1 for text in paragraphs)
+
 def parse_article_content(url):
     """Extract content from news articles"""
     try:
-        headers = {"User-Agent": random.choice(USER_AGENTS)}
-        response = session_news.get(url, headers=headers, timeout=20)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        paragraphs = soup.find_all('p')
-        return ' '.join([p.get_text() for p in paragraphs])[:5000]  # Limit to 5000 characters
+        return _fetch_article_text(url)
     except Exception:
         return ""
 
@@ -115,67 +299,187 @@ def parse_article_content(url):
 # 4) Text Summarization
 # -----------------------------
 
-def generate_summary(text):
-    """Summarize extracted article text"""
-    if not text or len(text) < 100:
-        return "No summary available"
+@st.cache_data(ttl=ARTICLE_CACHE_TTL, max_entries=512, show_spinner=False)
+def _summarize_texts(texts):
+    """Summarize texts with batched generate calls (cached across reruns)"""
+    tokenizer, model = load_summarizer_tokenizer(), load_summarizer_model()
+    summaries = []
+    for start in range(0, len(texts), SUMMARIZER_BATCH_SIZE):
+        inputs = tokenizer(list(texts[start:start + SUMMARIZER_BATCH_SIZE]), padding=True, truncation=True,
+                           return_tensors="pt").to(model.device)
+        with torch.inference_mode():
+            output_ids = model.generate(**inputs, max_length=100, min_length=30, num_beams=1, do_sample=False)
+        summaries.extend(tokenizer.batch_decode(output_ids, skip_special_tokens=True))
+    return summaries
+
+def _is_mostly_headline(title, text):
+    """True when the start of the page is essentially the headline again (word-set Jaccard)"""
+    title_words, text_words = set((title or "").lower().split()), set(text[:300].lower().split())
+    if not title_words or not text_words:
+        return False
+    return len(title_words & text_words) / len(title_words | text_words) > HEADLINE_OVERLAP_THRESHOLD
+
+def summarize_articles(articles):
+    """Download and summarize (link, title) pairs in one batch when the user asks (persisted on disk by URL)
+
+    Links without a summary (empty download, text too short, generation failed) are left out of the
+    result and nothing is persisted for them, so they can be retried.
+    """
+    summaries, pending = {}, []
+    for link, title in articles:
+        cached = disk_cache.get(f"summary:{link}")
+        if cached is None:
+            pending.append((link, title))
+        else:
+            summaries[link] = cached
+    
+    # Downloads are I/O bound; the per-host throttle keeps them polite
+    texts = fetch_pool.map(with_script_ctx(parse_article_content), [link for link, _ in pending])
+    fresh, to_generate = {}, []
+    for (link, title), text in zip(pending, texts):
+        if not text:
+            continue
+        # A seq2seq decode can't improve on a page that only repeats the headline
+        if _is_mostly_headline(title, text):
+            fresh[link] = text[:200]
+        else:
+            to_generate.append((link, text))
+    
+    generated = generate_summaries([text for _, text in to_generate])
+    fresh.update((link, summary) for (link, _), summary in zip(to_generate, generated) if summary is not None)
+    for link, summary in fresh.items():
+        disk_cache.set(f"summary:{link}", summary, expire=SUMMARY_CACHE_TTL)
+    summaries.update(fresh)
+    return summaries
+
+def summarize_article(url, title=""):
+    """Summarize a single article; None when no summary could be produced"""
+    return summarize_articles([(url, title)]).get(url)
+
+def generate_summaries(texts):
+    """Summarize a batch of extracted article texts (None where a text is too short or generation failed)"""
+    summaries = [None] * len(texts)
+    indices = [i for i, text in enumerate(texts) if text and len(text) >= 100]
+    
+    if not indices:
+        return summaries
     
     try:
-        summarizer = load_summarizer()
-        summary = summarizer(text, max_length=100, min_length=30, do_sample=False)
-        return summary[0]['summary_text']
+        results = _summarize_texts(tuple(texts[i] for i in indices))
     except Exception:
-        return "Summary generation failed"
+        return summaries
+    
+    for i, summary in zip(indices, results):
+        summaries[i] = summary
+    return summaries
 
 # -----------------------------
 # 5) Sentiment Analysis
 # -----------------------------
 
-def analyze_sentiment(text, method):
-    """Analyze sentiment using VADER or FinBERT"""
-    if not text:
-        return "Neutral"
+def _vader_labels(pairs):
+    """Label (title, summary) pairs with VADER"""
+    vader = load_vader()
+    texts = (f"{title}. {summary}" if summary else title for title, summary in pairs)
+    scores = np.fromiter((vader.polarity_scores(text)['compound'] for text in texts),
+                         dtype=np.float32, count=len(pairs))
+    label_ids = np.where(scores >= 0.05, SENTIMENT_IDS["Positive"],
+                         np.where(scores <= -0.05, SENTIMENT_IDS["Negative"], SENTIMENT_IDS["Neutral"]))
+    return np.asarray(SENTIMENT_LABELS)[label_ids].tolist()
+
+def _finbert_labels(pairs):
+    """Label (title, summary) pairs with FinBERT in batched forward passes"""
+    labels = [None] * len(pairs)
+    tokenizer, model = load_finbert_tokenizer(), load_finbert_model()
+    # Headline-only and headline+summary inputs are encoded separately (single vs pair),
+    # each sorted by length so a batch pads to similar-sized inputs, not to 512 tokens
+    for with_summary in (False, True):
+        group = sorted((i for i, (_, summary) in enumerate(pairs) if bool(summary) == with_summary),
+                       key=lambda i: len(pairs[i][0]) + len(pairs[i][1]))
+        for start in range(0, len(group), FINBERT_BATCH_SIZE):
+            batch = group[start:start + FINBERT_BATCH_SIZE]
+            titles = [pairs[i][0] for i in batch]
+            summaries = [pairs[i][1] for i in batch] if with_summary else None
+            # The fast (Rust) tokenizer trims the longer segment first, i.e. the summary
+            inputs = tokenizer(titles, summaries, padding=True, truncation="longest_first",
+                               max_length=FINBERT_MAX_TOKENS, return_tensors="pt").to(model.device)
+            with torch.inference_mode():
+                predictions = model(**inputs).logits.argmax(-1).tolist()
+            for i, prediction in zip(batch, predictions):
+                labels[i] = model.config.id2label[prediction].capitalize()
+    return labels
+
+SENTIMENT_LABELERS = {"VADER": _vader_labels, "FinBERT": _finbert_labels}
+
+def _cached_labels(pairs, method):
+    """Label (title, summary) pairs, looking each one up on disk first and batching only the misses"""
+    digests = (hashlib.sha1(title.encode() + b"\0" + summary.encode()).hexdigest() for title, summary in pairs)
+    keys = [f"{method.lower()}:{digest}" for digest in digests]
+    labels = [disk_cache.get(key) for key in keys]
+    missing = [i for i, label in enumerate(labels) if label is None]
     
-    clean_text = ' '.join(text.split()[:512])  # Truncate to 512 words
+    if missing:
+        for i, label in zip(missing, SENTIMENT_LABELERS[method]([pairs[i] for i in missing])):
+            labels[i] = label
+            disk_cache.set(keys[i], label, expire=SENTIMENT_CACHE_TTL)
+    return labels
+
+def analyze_sentiments(titles, summaries, method):
+    """Analyze sentiment of headlines (with their summaries, where available) using VADER or FinBERT"""
+    labels = ["Neutral"] * len(titles)
+    indices = [i for i, title in enumerate(titles) if title]
+    pairs = [(titles[i], summaries[i] or "") for i in indices]
+    
+    if not pairs or method not in SENTIMENT_LABELERS:
+        return labels
     
     try:
-        if method == "VADER":
-            scores = load_vader().polarity_scores(clean_text)
-            return "Positive" if scores['compound'] >= 0.05 else "Negative" if scores['compound'] <= -0.05 else "Neutral"
-        elif method == "FinBERT":
-            result = load_finbert()(clean_text, truncation=True)[0]
-            return result['label'].capitalize()
+        results = _cached_labels(pairs, method)
     except Exception:
-        return "Neutral"
+        return labels
+    
+    for i, label in zip(indices, results):
+        labels[i] = label
+    return labels
 
 # -----------------------------
 # 6) Fetch & Analyze News
 # -----------------------------
 
-def fetch_and_analyze_news(company, method="VADER", use_newsdata=False):
-    """Fetch, summarize, and analyze sentiment of news"""
-    sources = [fetch_news_newsdata(company)] if use_newsdata else [scrape_google_news(company)]
-    
-    articles = [article for source in sources for article in source]
+def fetch_and_analyze_news(company, method="VADER", use_newsdata=True):
+    """Fetch and analyze sentiment of news"""
+    # The JSON API needs no HTML parsing; use RSS only if it is disabled or fails.
+    # RSS is only started early when the API is slow to answer, so a timeout doesn't
+    # cost a second round-trip while a prompt API reply never touches Google News.
+    articles, prefetch = [], None
+    if use_newsdata:
+        pending = fetch_pool.submit(_fetch_newsdata_articles, company)
+        if not wait([pending], timeout=NEWSDATA_HEDGE_DELAY).done:
+            prefetch = fetch_pool.submit(_fetch_google_news_articles, company)
+        articles = fetch_news_newsdata(company, pending)
+    if not articles:
+        articles = scrape_google_news(company, prefetch)
+    articles = deduplicate_articles(articles)
     
     if not articles:
-        return "Neutral", []
+        return "Neutral", [], np.zeros(len(SENTIMENT_LABELS), dtype=np.int64)
 
-    sentiment_counts = {"Positive": 0, "Negative": 0, "Neutral": 0}
-    analyzed_news = []
+    # Classify headline + source summary; missing summaries are generated only on demand
+    sentiments = analyze_sentiments([title for title, _, _ in articles],
+                                    [summary for _, summary, _ in articles], method)
 
-    for title, summary, link in articles:
-        summary = summary or generate_summary(parse_article_content(link))
-        sentiment = analyze_sentiment(f"{title}. {summary}", method)
-        
-        sentiment_counts[sentiment] += 1
-        analyzed_news.append((title, summary, sentiment, link))
+    analyzed_news = [(title, summary, sentiment, link)
+                     for (title, summary, link), sentiment in zip(articles, sentiments)]
+
+    # Counts per label in SENTIMENT_LABELS order, without a per-headline branch
+    label_ids = np.asarray([SENTIMENT_IDS[sentiment] for sentiment in sentiments], dtype=np.int8)
+    sentiment_counts = np.bincount(label_ids, minlength=len(SENTIMENT_LABELS))
 
-    total = sum(sentiment_counts.values())
-    overall = ("Positive" if sentiment_counts["Positive"] / total > 0.4 else
-               "Negative" if sentiment_counts["Negative"] / total > 0.4 else "Neutral") if total > 0 else "Neutral"
+    shares = sentiment_counts / sentiment_counts.sum()
+    overall = ("Positive" if shares[SENTIMENT_IDS["Positive"]] > 0.4 else
+               "Negative" if shares[SENTIMENT_IDS["Negative"]] > 0.4 else "Neutral")
 
-    return overall, analyzed_news
+    return overall, analyzed_news, sentiment_counts
 
 # -----------------------------
 # 7) Streamlit UI
@@ -185,29 +489,54 @@ st.title("📈 Stock News Sentiment Analyzer")
 
 company = st.text_input("Enter Company Name", "Reliance Industries")
 method = st.selectbox("Sentiment Analysis Method", ["VADER", "FinBERT"])
-use_newsdata = st.checkbox("Use NewsData.io API (requires valid API key)")
+use_newsdata = st.checkbox("Use NewsData.io API (requires valid API key)",
+                           value=NEWS_API_KEY != "YOUR_API_KEY_HERE")
 
 if st.button("Analyze News Sentiment"):
     with st.spinner("Gathering and analyzing news..."):
         start_time = time.time()
-        overall, articles = fetch_and_analyze_news(company, method, use_newsdata)
+        # Kept in session state so "Summarize" clicks don't discard the analysis
+        st.session_state.analysis = fetch_and_analyze_news(company, method, use_newsdata)
+        st.session_state.analysis_inputs = (company, method, use_newsdata)
+        st.session_state.summaries = {}
+
+if "analysis" in st.session_state:
+    overall, articles, sentiment_counts = st.session_state.analysis
+    analyzed_company, analyzed_method, _ = st.session_state.analysis_inputs
+    if st.session_state.analysis_inputs != (company, method, use_newsdata):
+        st.warning(f"Showing the earlier {analyzed_method} analysis of {analyzed_company}; "
+                   "click \"Analyze News Sentiment\" to analyze the current inputs.")
     
     st.subheader(f"Overall Sentiment: **{overall}**")
     
     # Display sentiment distribution
-    counts = pd.DataFrame({"Sentiment": ["Positive", "Negative", "Neutral"],
-                           "Count": [sum(1 for a in articles if a[2] == "Positive"),
-                                     sum(1 for a in articles if a[2] == "Negative"),
-                                     sum(1 for a in articles if a[2] == "Neutral")]})
-    st.bar_chart(counts.set_index("Sentiment"))
+    counts = pd.DataFrame(sentiment_counts, index=pd.Index(SENTIMENT_LABELS, name="Sentiment"), columns=["Count"])
+    st.bar_chart(counts)
     
     # Display news articles
     st.subheader("News Analysis")
+    missing = [(link, title) for title, summary, _, link in articles
+               if not summary and link and link not in st.session_state.summaries]
+    if len(missing) > 1 and st.button(f"Summarize all {len(missing)} missing"):
+        with st.spinner("Summarizing articles..."):
+            st.session_state.summaries.update(summarize_articles(missing))
+    
     for idx, (title, summary, sentiment, link) in enumerate(articles, 1):
         with st.expander(f"{idx}. {sentiment} - {title[:70]}..."):
-            st.markdown(f"**Summary:** {summary}")
-            st.markdown(f"**Sentiment:** {sentiment}")
+            # Summarize articles without a source summary only when the user asks
+            summary = summary or st.session_state.summaries.get(link)
+            if not summary and link and st.button("Summarize article", key=f"summarize_{idx}"):
+                with st.spinner("Summarizing article..."):
+                    summary = summarize_article(link, title)
+                if summary:
+                    st.session_state.summaries[link] = summary
+                else:
+                    st.caption("Couldn't summarize this article right now; try again later.")
+            
+            # One markdown element per article instead of one per line
+            details = [f"**Summary:** {summary or 'No summary available'}", f"**Sentiment:** {sentiment}"]
             if link:
-                st.markdown(f"[Read full article ↗️]({link})")
+                details.append(f"[Read full article ↗️]({link})")
+            st.markdown("\n\n".join(details))
 
 st.info("This tool uses web scraping; results depend on news availability and sources.")